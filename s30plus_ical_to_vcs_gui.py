@@ -1,12 +1,34 @@
 import os
 import re
+import argparse
+import asyncio
 import json
 import sys
 import ctypes
+import bisect
+import calendar
+import copy
+import heapq
+import hashlib
+import tempfile
+import io
+import zipfile
+import threading
+import time
+import functools
 import tkinter as tk
 from tkinter import filedialog, messagebox, Menu
 from tkinterdnd2 import DND_FILES, TkinterDnD
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
 
 
 def resource_path(relative_path):
@@ -15,6 +37,7 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+@functools.lru_cache(maxsize=65536)
 def clean_text(text):
     """Replaces umlauts and removes special characters for the Nokia."""
     replacements = {
@@ -31,6 +54,246 @@ def clean_text(text):
     return re.sub(r"[^a-zA-Z0-9\s\.\!\?\-\:\(\)\,\/]", "", text).strip()
 
 
+# --- Timezone handling ---
+# Offset tables are computed once per timezone and cached, so converting a
+# timestamp afterwards only costs a single bisect.
+TZ_FIRST_YEAR = 1970
+TZ_LAST_YEAR = 2100
+EPOCH = datetime(1970, 1, 1)
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+_zone_table_cache = {}
+_vtimezone_table_cache = {}
+
+
+def ical_to_seconds(value):
+    """Converts an iCal date-time string (e.g. 20240131T143000) to epoch seconds."""
+    return calendar.timegm(
+        (
+            int(value[0:4]),
+            int(value[4:6]),
+            int(value[6:8]),
+            int(value[9:11] or 0),
+            int(value[11:13] or 0),
+            int(value[13:15] or 0),
+        )
+    )
+
+
+def seconds_to_ical(seconds):
+    """Converts epoch seconds back to an iCal date-time string."""
+    return (EPOCH + timedelta(seconds=seconds)).strftime("%Y%m%dT%H%M%S")
+
+
+def parse_utc_offset(value):
+    """Converts an offset like '+0100' or '-053000' to seconds."""
+    value = value.strip()
+    sign = -1 if value.startswith("-") else 1
+    digits = value.lstrip("+-").ljust(6, "0")
+    return sign * (int(digits[0:2]) * 3600 + int(digits[2:4]) * 60 + int(digits[4:6]))
+
+
+class TimezoneTable:
+    """Precomputed UTC offset transitions of a single timezone."""
+
+    def __init__(self, transitions, offsets):
+        # offsets[i] is valid before transitions[i], offsets[-1] after the last one
+        self.transitions = transitions
+        self.offsets = offsets
+        # Wall clock time at which each transition happens (still in the old offset)
+        self.local_transitions = [t + o for t, o in zip(transitions, offsets)]
+
+    def utc_to_local(self, utc_seconds):
+        return (
+            utc_seconds
+            + self.offsets[bisect.bisect_right(self.transitions, utc_seconds)]
+        )
+
+    def local_to_utc(self, local_seconds):
+        return (
+            local_seconds
+            - self.offsets[bisect.bisect_right(self.local_transitions, local_seconds)]
+        )
+
+
+def _probe_offset_table(offset_at):
+    """Builds a TimezoneTable by sampling a utcoffset function week by week."""
+    step = 7 * 86400
+    t = calendar.timegm((TZ_FIRST_YEAR, 1, 1, 0, 0, 0))
+    end = calendar.timegm((TZ_LAST_YEAR + 1, 1, 1, 0, 0, 0))
+    prev = offset_at(t)
+    transitions = []
+    offsets = [prev]
+    while t < end:
+        nxt = t + step
+        off = offset_at(nxt)
+        if off != prev:
+            # Narrow the change down to the exact second
+            lo, hi = t, nxt
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if offset_at(mid) == prev:
+                    lo = mid
+                else:
+                    hi = mid
+            transitions.append(hi)
+            offsets.append(off)
+            prev = off
+        t = nxt
+    return TimezoneTable(transitions, offsets)
+
+
+def get_zoneinfo_table(name):
+    """Returns the cached table of an IANA timezone, or None if it is unknown.
+    An empty name stands for the local timezone of this PC."""
+    name = (name or "").strip()
+    if name in _zone_table_cache:
+        return _zone_table_cache[name]
+
+    table = None
+    if not name:
+        table = _probe_offset_table(
+            lambda t: int(
+                datetime.fromtimestamp(t, timezone.utc)
+                .astimezone()
+                .utcoffset()
+                .total_seconds()
+            )
+        )
+    elif name.upper() in ("UTC", "GMT", "Z"):
+        table = TimezoneTable([], [0])
+    elif ZoneInfo is not None:
+        try:
+            tz = ZoneInfo(name)
+            table = _probe_offset_table(
+                lambda t: int(datetime.fromtimestamp(t, tz).utcoffset().total_seconds())
+            )
+        except Exception:
+            table = None
+
+    # Unknown names are not cached, so arbitrary input cannot grow the cache
+    if table is not None:
+        _zone_table_cache[name] = table
+    return table
+
+
+def is_valid_timezone(name):
+    """Cheap check whether get_zoneinfo_table(name) will find a timezone,
+    without building its table."""
+    name = (name or "").strip()
+    if not name or name.upper() in ("UTC", "GMT", "Z") or name in _zone_table_cache:
+        return True
+    if ZoneInfo is None:
+        return False
+    try:
+        ZoneInfo(name)
+    except Exception:
+        return False
+    return True
+
+
+def _nth_weekday(year, month, weekday, n):
+    """Day of month of the n-th (negative: counted from the end) weekday."""
+    last_day = calendar.monthrange(year, month)[1]
+    if n > 0:
+        day = 1 + (weekday - calendar.weekday(year, month, 1)) % 7 + (n - 1) * 7
+    else:
+        day = last_day - (calendar.weekday(year, month, last_day) - weekday) % 7
+        day += (n + 1) * 7
+    return day if 1 <= day <= last_day else None
+
+
+def _rule_onsets(comp):
+    """Yields the local onset times (epoch seconds) of a STANDARD/DAYLIGHT block."""
+    dtstart = comp["dtstart"]
+    if not dtstart:
+        return
+    start_secs = ical_to_seconds(dtstart)
+    yield start_secs
+    for rdate in comp["rdates"]:
+        yield ical_to_seconds(rdate)
+
+    rrule = comp["rrule"].upper()
+    if "FREQ=YEARLY" not in rrule:
+        return
+    parts = dict(p.split("=", 1) for p in rrule.split(";") if "=" in p)
+    month = int(parts.get("BYMONTH", dtstart[4:6]).split(",")[0])
+    month_days = (
+        [int(d) for d in parts["BYMONTHDAY"].split(",")]
+        if "BYMONTHDAY" in parts
+        else []
+    )
+    byday = re.match(r"([+-]?\d*)(MO|TU|WE|TH|FR|SA|SU)", parts.get("BYDAY", ""))
+    until = ical_to_seconds(parts["UNTIL"]) if "UNTIL" in parts else None
+    count = int(parts["COUNT"]) if "COUNT" in parts else None
+    time_str = dtstart[9:15].ljust(6, "0")
+
+    emitted = 1
+    for year in range(int(dtstart[:4]) + 1, TZ_LAST_YEAR + 1):
+        if count is not None and emitted >= count:
+            break
+        day = None
+        if byday:
+            weekday = WEEKDAYS[byday.group(2)]
+            if byday.group(1) not in ("", "+"):
+                day = _nth_weekday(year, month, weekday, int(byday.group(1)))
+            elif month_days:
+                # Older style, e.g. BYMONTHDAY=8,9,10,11,12,13,14;BYDAY=SU
+                day = next(
+                    (
+                        d
+                        for d in month_days
+                        if calendar.weekday(year, month, d) == weekday
+                    ),
+                    None,
+                )
+        elif month_days:
+            day = month_days[0]
+        else:
+            day = int(dtstart[6:8])
+        if not day:
+            continue
+        onset = ical_to_seconds(f"{year:04d}{month:02d}{day:02d}T{time_str}")
+        # UNTIL is given in UTC; the comparison is close enough for yearly rules
+        if until is not None and onset > until:
+            break
+        emitted += 1
+        yield onset
+
+
+def get_vtimezone_table(tzid, components):
+    """Builds (or fetches from cache) the table of a VTIMEZONE definition."""
+    key = (
+        tzid,
+        tuple(
+            (c["dtstart"], c["from"], c["to"], c["rrule"], tuple(c["rdates"]))
+            for c in components
+        ),
+    )
+    if key in _vtimezone_table_cache:
+        return _vtimezone_table_cache[key]
+
+    changes = []
+    for comp in components:
+        try:
+            offset_from = parse_utc_offset(comp["from"])
+            offset_to = parse_utc_offset(comp["to"])
+            for onset in _rule_onsets(comp):
+                changes.append((onset - offset_from, offset_from, offset_to))
+        except (ValueError, KeyError, IndexError):
+            continue
+
+    table = None
+    if changes:
+        changes.sort()
+        transitions = [c[0] for c in changes]
+        offsets = [changes[0][1]] + [c[2] for c in changes]
+        table = TimezoneTable(transitions, offsets)
+
+    _vtimezone_table_cache[key] = table
+    return table
+
+
 class ToolTip:
     """Creates a small hover window (tooltip) for GUI elements."""
 
@@ -85,6 +348,28 @@ class ToolTip:
             tw.destroy()
 
 
+def shift_date(date_str, freq, n):
+    """Moves a YYYYMMDD date by n steps of the given RRULE frequency."""
+    dt = datetime.strptime(date_str[:8], "%Y%m%d")
+    if freq == "WEEKLY":
+        dt += timedelta(weeks=n)
+    elif freq in ("MONTHLY", "YEARLY"):
+        months = dt.month - 1 + (n * 12 if freq == "YEARLY" else n)
+        year = dt.year + months // 12
+        month = months % 12 + 1
+        day = min(dt.day, calendar.monthrange(year, month)[1])
+        dt = dt.replace(year=year, month=month, day=day)
+    else:
+        dt += timedelta(days=n)
+    return dt.strftime("%Y%m%d")
+
+
+# Content keys are stored next to the UIDs in the profile list
+CONTENT_KEY_PREFIX = "content:"
+# Profile entries are kept this many days after the event's last date
+PROFILE_KEEP_DAYS = 30
+
+
 class Event:
     def __init__(
         self,
@@ -95,6 +380,9 @@ class Event:
         description="",
         rrule="",
         uid="",
+        exdates=None,
+        recurrence_id="",
+        status="",
     ):
         start_raw = start.split("Z")[0].split("+")[0]
         end_raw = end.split("Z")[0].split("+")[0] if end else start_raw
@@ -149,12 +437,172 @@ class Event:
         self.uid = uid.strip() if uid else f"{self.start}-{self.summary_clean}"
         self.final_summary = ""
 
+        # Exceptions of a recurring series (only the date part matters on the Nokia)
+        self.exdates = {d.strip()[:8] for d in exdates or [] if d.strip()}
+        self.recurrence_id = recurrence_id.strip()
+        self.cancelled = status.strip().upper() == "CANCELLED"
+        # Position in the calendar, keeps the chronological sort stable
+        self.seq = (0, 0)
+
+    # Fields that survive a round trip through a compact record (see EventSpill)
+    RECORD_FIELDS = (
+        "start",
+        "seq",
+        "end_orig",
+        "summary_clean",
+        "location_clean",
+        "rrule_orig",
+        "uid",
+        "time_suffix",
+    )
+
+    def to_record(self):
+        record = [getattr(self, f) for f in self.RECORD_FIELDS]
+        record[1] = list(self.seq)  # Same shape as after a JSON round trip
+        return record
+
+    @classmethod
+    def from_record(cls, record):
+        ev = cls.__new__(cls)
+        for f, v in zip(cls.RECORD_FIELDS, record):
+            setattr(ev, f, v)
+        ev.seq = tuple(ev.seq)
+        ev.final_summary = ""
+        ev.exdates = set()
+        ev.recurrence_id = ""
+        ev.cancelled = False
+        return ev
+
     def get_interval(self):
         if not self.rrule_orig:
             return 1
         match = re.search(r"INTERVAL=(\d+)", self.rrule_orig.upper())
         return int(match.group(1)) if match else 1
 
+    def get_last_date(self):
+        """Last day (YYYYMMDD) the event or series takes place, None for endless series."""
+        if not self.rrule_orig:
+            return max(self.start[:8], self.end_orig[:8])
+
+        rrule_upper = self.rrule_orig.upper()
+        match_until = re.search(r"UNTIL=([0-9]{8})", rrule_upper)
+        match_count = re.search(r"COUNT=(\d+)", rrule_upper)
+
+        if match_until:
+            return match_until.group(1)
+        elif match_count:
+            # Approximation of the end date for COUNT-based series
+            count = int(match_count.group(1))
+            interval = self.get_interval()
+            freq = self.get_freq() or "DAILY"
+
+            days_mult = {
+                "DAILY": 1,
+                "WEEKLY": 7,
+                "MONTHLY": 31,
+                "YEARLY": 365,
+            }.get(freq, 1)
+            total_days = count * interval * days_mult
+
+            try:
+                start_dt = datetime.strptime(self.start[:8], "%Y%m%d")
+                end_dt = start_dt + timedelta(days=total_days)
+                return end_dt.strftime("%Y%m%d")
+            except ValueError:
+                return None
+        else:
+            # Infinite series without UNTIL or COUNT
+            return None
+
+    def get_freq(self):
+        match = re.search(
+            r"FREQ=(DAILY|WEEKLY|MONTHLY|YEARLY)", self.rrule_orig.upper()
+        )
+        return match.group(1) if match else ""
+
+    def is_occurrence(self, date_str):
+        """Checks if a YYYYMMDD date is hit by the series (ignoring BYDAY & co)."""
+        freq = self.get_freq()
+        interval = self.get_interval()
+        start = datetime.strptime(self.start[:8], "%Y%m%d")
+        date = datetime.strptime(date_str, "%Y%m%d")
+        if date < start:
+            return False
+        if freq in ("DAILY", "WEEKLY"):
+            step = interval * (7 if freq == "WEEKLY" else 1)
+            return (date - start).days % step == 0
+        if freq == "MONTHLY":
+            months = (date.year - start.year) * 12 + date.month - start.month
+            return (
+                months % interval == 0
+                and shift_date(self.start, freq, months) == date_str
+            )
+        if freq == "YEARLY":
+            years = date.year - start.year
+            return (
+                years % interval == 0
+                and shift_date(self.start, freq, years) == date_str
+            )
+        return False
+
+    def split_series(self):
+        """Splits a series around its excluded dates into gap-free sub-series,
+        since vCalendar 1.0 on the Nokia cannot express single exceptions."""
+        freq = self.get_freq()
+        if not freq or not self.exdates:
+            return [self]
+
+        interval = self.get_interval()
+        r = self.rrule_orig.upper()
+        match_until = re.search(r"UNTIL=([0-9]{8})", r)
+        match_count = re.search(r"COUNT=(\d+)", r)
+        try:
+            if match_until:
+                until = match_until.group(1)
+            elif match_count:
+                until = shift_date(
+                    self.start, freq, (int(match_count.group(1)) - 1) * interval
+                )
+            else:
+                until = None
+            exdates = sorted(d for d in self.exdates if self.is_occurrence(d))
+            day_span = (
+                datetime.strptime(self.end_orig[:8], "%Y%m%d")
+                - datetime.strptime(self.start[:8], "%Y%m%d")
+            ).days
+        except ValueError:
+            return [self]
+
+        segments = []
+        seg_start = self.start[:8]
+        for ex in exdates:
+            if until and ex > until:
+                break
+            if ex > seg_start:
+                segments.append((seg_start, shift_date(ex, "DAILY", -1)))
+            seg_start = shift_date(ex, freq, interval)
+        if until is None or seg_start <= until:
+            segments.append((seg_start, until))
+
+        base_rule = ";".join(
+            p
+            for p in self.rrule_orig.split(";")
+            if not p.upper().startswith(("UNTIL=", "COUNT="))
+        )
+        parts = []
+        for i, (seg_start, seg_until) in enumerate(segments):
+            ev = copy.copy(self)
+            ev.seq = (self.seq[0], i)
+            ev.exdates = set()
+            ev.start = seg_start + self.start[8:]
+            ev.end_orig = shift_date(seg_start, "DAILY", day_span) + self.end_orig[8:]
+            ev.rrule_orig = base_rule + (f";UNTIL={seg_until}" if seg_until else "")
+            # Later parts are new events for the phone and need their own UID
+            if seg_start != self.start[:8]:
+                ev.uid = f"{self.uid}-{seg_start}"
+            parts.append(ev)
+        return parts
+
     def translate_and_build_summary(self):
         r = self.rrule_orig.upper()
         interval = self.get_interval()
@@ -244,133 +692,734 @@ class Event:
 
         return "\r\n".join(lines)
 
+    def get_content_key(self):
+        """Hash of the normalized event content, used to find the same event
+        under different UIDs (e.g. an invite and the organizer's copy)."""
+        rrule = ";".join(sorted(p for p in self.rrule_orig.upper().split(";") if p))
+        normalized = "|".join(
+            [
+                self.start,
+                self.end_orig,
+                " ".join(self.summary_clean.lower().split()),
+                " ".join(self.location_clean.lower().split()),
+                rrule,
+            ]
+        )
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:20]
+        return f"{CONTENT_KEY_PREFIX}{digest}"
+
+    def is_title_truncated(self):
+        """Checks if title or location will be shortened to fit the 40 characters."""
+        self.translate_and_build_summary()
+        loc_str = f", {self.location_clean}" if self.location_clean else ""
+        return not self.final_summary.startswith(self.summary_clean + loc_str)
+
     def get_filename(self):
         clean_title = re.sub(r"[^a-zA-Z0-9]", "", self.summary_clean.replace(" ", "_"))
         return f"{clean_title[:15]}_{self.start[:15]}.vcs"
 
 
+def split_property(line):
+    """Splits a content line into name, parameters and value.
+    Colons inside quoted parameter values (e.g. Outlook TZIDs) are respected."""
+    in_quotes = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == ":" and not in_quotes:
+            name, *raw_params = line[:i].split(";")
+            params = {}
+            for p in raw_params:
+                if "=" in p:
+                    pk, pv = p.split("=", 1)
+                    params[pk.upper()] = pv.strip('"')
+            return name.upper(), params, line[i + 1 :]
+    raise ValueError("Content line without value")
+
+
 class Calendar:
-    def __init__(self, file_path):
+    def __init__(self, file_path, device_tz="", lines=None, memory_budget=0):
         self.events = []
-        if not os.path.exists(file_path):
-            return
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            tmp = {
-                "start": "",
-                "end": "",
-                "summary": "",
-                "location": "",
-                "description": "",
-                "rrule": "",
-                "uid": "",
-            }
-            in_ev = False
-            for line in f:
-                line = line.strip()
-                if line.startswith("BEGIN:VEVENT"):
-                    in_ev = True
-                elif line.startswith("END:VEVENT"):
-                    self.events.append(Event(**tmp))
-                    tmp = {
-                        "start": "",
-                        "end": "",
-                        "summary": "",
-                        "location": "",
-                        "description": "",
-                        "rrule": "",
-                        "uid": "",
-                    }
-                    in_ev = False
-                elif in_ev and ":" in line:
-                    try:
-                        k_f, v = line.split(":", 1)
-                        k = k_f.split(";")[0]
-                        if k == "DTSTART":
-                            tmp["start"] = v
-                        elif k == "DTEND":
-                            tmp["end"] = v
-                        elif k == "SUMMARY":
-                            tmp["summary"] = v
-                        elif k == "LOCATION":
-                            tmp["location"] = v
-                        elif k == "RRULE":
-                            tmp["rrule"] = v
-                        elif k == "UID":
-                            tmp["uid"] = v
-                    except (ValueError, IndexError):
-                        continue
-                    except Exception as e:
-                        print(f"Unexpected error parsing line '{line}': {e}")
-                        continue
+        self.event_count = 0
+        # With a memory budget (in bytes), plain events are spilled to sorted temp files.
+        # Half of it is left for holding back dead past events during the scan.
+        self.spill = (
+            EventSpill(max(1, memory_budget // 2)) if memory_budget > 0 else None
+        )
+        self.scanned = False
+        self.device_table = get_zoneinfo_table(device_tz)
+        self.tz_tables = {}  # TZID -> TimezoneTable (or None if unknown)
+        self.vtimezones = {}  # TZID -> list of STANDARD/DAYLIGHT blocks
+        if lines is None:
+            if not os.path.exists(file_path):
+                return
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                self.parse(f)
+        else:
+            self.parse(lines)
+
+    def parse(self, lines):
+        # UID-keyed indexes so overrides find their series without searching self.events
+        masters = {}  # UID -> recurring master event
+        overrides = {}  # UID -> list of RECURRENCE-ID events
+        tmp = {
+            "start": "",
+            "end": "",
+            "summary": "",
+            "location": "",
+            "description": "",
+            "rrule": "",
+            "uid": "",
+            "exdates": [],
+            "recurrence_id": "",
+            "status": "",
+        }
+        start_tzid = end_tzid = ""
+        in_ev = False
+        tz_id = None
+        tz_comp = None
+        for line in lines:
+            line = line.strip()
+            if line.startswith("BEGIN:VEVENT"):
+                in_ev = True
+            elif line.startswith("END:VEVENT"):
+                tmp["start"] = self.to_device_time(tmp["start"], start_tzid)
+                tmp["end"] = self.to_device_time(tmp["end"], end_tzid)
+                ev = Event(**tmp)
+                if ev.recurrence_id:
+                    overrides.setdefault(ev.uid, []).append(ev)
+                    if self.spill is not None:
+                        self.spill.reserve(ev)
+                else:
+                    ev.seq = (self.event_count, 0)
+                    self.event_count += 1
+                    if (
+                        self.spill is not None
+                        and not ev.rrule_orig
+                        and not ev.cancelled
+                    ):
+                        # Plain events are never touched by merge_series
+                        self.spill.append(ev)
+                    else:
+                        self.events.append(ev)
+                        if self.spill is not None:
+                            # Stays in memory for merge_series, counts against the budget
+                            self.spill.reserve(ev)
+                        if ev.rrule_orig:
+                            masters[ev.uid] = ev
+                tmp = {
+                    "start": "",
+                    "end": "",
+                    "summary": "",
+                    "location": "",
+                    "description": "",
+                    "rrule": "",
+                    "uid": "",
+                    "exdates": [],
+                    "recurrence_id": "",
+                    "status": "",
+                }
+                start_tzid = end_tzid = ""
+                in_ev = False
+            elif line.startswith("BEGIN:VTIMEZONE"):
+                tz_id = ""
+            elif line.startswith("END:VTIMEZONE"):
+                tz_id = None
+            elif tz_id is not None and line.startswith(
+                ("BEGIN:STANDARD", "BEGIN:DAYLIGHT")
+            ):
+                tz_comp = {
+                    "dtstart": "",
+                    "from": "",
+                    "to": "",
+                    "rrule": "",
+                    "rdates": [],
+                }
+            elif tz_id is not None and line.startswith(
+                ("END:STANDARD", "END:DAYLIGHT")
+            ):
+                if tz_comp is not None:
+                    self.vtimezones.setdefault(tz_id, []).append(tz_comp)
+                tz_comp = None
+            elif (in_ev or tz_id is not None) and ":" in line:
+                try:
+                    k, params, v = split_property(line)
+                    if tz_id is not None:
+                        if k == "TZID":
+                            tz_id = v.strip().strip('"')
+                        elif tz_comp is not None:
+                            if k == "DTSTART":
+                                tz_comp["dtstart"] = v.strip()
+                            elif k == "TZOFFSETFROM":
+                                tz_comp["from"] = v
+                            elif k == "TZOFFSETTO":
+                                tz_comp["to"] = v
+                            elif k == "RRULE":
+                                tz_comp["rrule"] = v
+                            elif k == "RDATE":
+                                tz_comp["rdates"].extend(v.strip().split(","))
+                    elif k == "DTSTART":
+                        tmp["start"] = v
+                        start_tzid = params.get("TZID", "")
+                    elif k == "DTEND":
+                        tmp["end"] = v
+                        end_tzid = params.get("TZID", "")
+                    elif k == "SUMMARY":
+                        tmp["summary"] = v
+                    elif k == "LOCATION":
+                        tmp["location"] = v
+                    elif k == "RRULE":
+                        tmp["rrule"] = v
+                    elif k == "UID":
+                        tmp["uid"] = v
+                    elif k == "EXDATE":
+                        tzid = params.get("TZID", "")
+                        tmp["exdates"].extend(
+                            self.to_device_time(d, tzid) for d in v.split(",")
+                        )
+                    elif k == "RECURRENCE-ID":
+                        tmp["recurrence_id"] = self.to_device_time(
+                            v, params.get("TZID", "")
+                        )
+                    elif k == "STATUS":
+                        tmp["status"] = v
+                except (ValueError, IndexError):
+                    continue
+                except Exception as e:
+                    print(f"Unexpected error parsing line '{line}': {e}")
+                    continue
+
+        self.events = self.merge_series(masters, overrides)
+
+    def merge_series(self, masters, overrides):
+        """Applies EXDATEs and RECURRENCE-ID overrides to their series in one pass.
+        Moved/edited instances become standalone events, cancelled ones vanish."""
+        standalone = []
+        for uid, group in overrides.items():
+            master = masters.get(uid)
+            for ov in group:
+                if master is not None:
+                    master.exdates.add(ov.recurrence_id[:8])
+                if not ov.cancelled:
+                    ov.uid = f"{uid}-{ov.recurrence_id}"
+                    ov.seq = (self.event_count + len(standalone), 0)
+                    standalone.append(ov)
+
+        merged = []
+        for e in self.events:
+            if e.cancelled:
+                continue
+            if e.exdates:
+                merged.extend(e.split_series())
+            else:
+                merged.append(e)
+        return merged + standalone
+
+    def get_tz_table(self, tzid):
+        """Resolves a TZID via the calendar's own VTIMEZONE blocks, falling back to zoneinfo."""
+        if tzid not in self.tz_tables:
+            table = None
+            if tzid in self.vtimezones:
+                table = get_vtimezone_table(tzid, self.vtimezones[tzid])
+            if table is None:
+                table = get_zoneinfo_table(tzid.lstrip("/"))
+            self.tz_tables[tzid] = table
+        return self.tz_tables[tzid]
+
+    def to_device_time(self, value, tzid=""):
+        """Converts a DTSTART/DTEND value to the wall clock time of the phone.
+        All-day dates and floating times (no Z, no TZID) are kept as they are."""
+        value = value.strip()
+        if "T" not in value or self.device_table is None:
+            return value
+        try:
+            if value.upper().endswith("Z"):
+                utc = ical_to_seconds(value)
+            elif tzid:
+                table = self.get_tz_table(tzid)
+                if table is None:
+                    return value
+                utc = table.local_to_utc(ical_to_seconds(value))
+            else:
+                return value
+            return seconds_to_ical(self.device_table.utc_to_local(utc))
+        except (ValueError, IndexError, OverflowError):
+            return value
 
     def scan(self, all_past=False):
-        # Sorts everything chronologically first
-        self.events.sort(key=lambda x: x.start)
+        return list(self.scan_iter(all_past))
+
+    def sorted_events(self):
+        """Yields all events chronologically. Spilled runs are merged lazily."""
+        if self.spill is None:
+            # Sorts everything chronologically first
+            self.events.sort(key=lambda x: x.start)
+            yield from self.events
+        else:
+            for record in self.spill.merge([e.to_record() for e in self.events]):
+                yield Event.from_record(record)
+
+    def scan_iter(self, all_past=False):
         today = datetime.now().strftime("%Y%m%d")
 
-        scenario2_events = []
-        dead_past_events = []
+        if self.spill is None:
+            dead_past_events = []
+        else:
+            # The spilled runs are consumed by the merge
+            if self.scanned:
+                raise RuntimeError(
+                    "A calendar with a memory budget can only be scanned once"
+                )
+            self.scanned = True
+            dead_past_events = EventSpill(self.spill.memory_budget)
+
+        for e in self.sorted_events():
+            # Future/ongoing events come first, in chronological order
+            if is_scenario2(e, today):
+                yield e
+            elif all_past:
+                dead_past_events.append(e)
 
-        for e in self.events:
-            is_scenario2 = False
+        # If all_past is true, dead events are appended afterwards to fill the quota
+        if all_past:
+            if self.spill is None:
+                yield from dead_past_events
+            else:
+                yield from map(Event.from_record, dead_past_events.replay())
 
-            # Check if it is a future/today event or an ongoing series
-            if e.start[:8] >= today:
-                is_scenario2 = True
-            elif e.rrule_orig:
-                rrule_upper = e.rrule_orig.upper()
-                match_until = re.search(r"UNTIL=([0-9]{8})", rrule_upper)
-                match_count = re.search(r"COUNT=(\d+)", rrule_upper)
-
-                if match_until:
-                    if match_until.group(1) >= today:
-                        is_scenario2 = True
-                elif match_count:
-                    # Approximation of the end date for COUNT-based series
-                    count = int(match_count.group(1))
-                    interval = e.get_interval()
-                    freq_match = re.search(
-                        r"FREQ=(DAILY|WEEKLY|MONTHLY|YEARLY)", rrule_upper
-                    )
-                    freq = freq_match.group(1) if freq_match else "DAILY"
 
-                    days_mult = {
-                        "DAILY": 1,
-                        "WEEKLY": 7,
-                        "MONTHLY": 31,
-                        "YEARLY": 365,
-                    }.get(freq, 1)
-                    total_days = count * interval * days_mult
+def is_scenario2(e, today):
+    """Checks if an event is a future/today event or an ongoing series."""
+    if e.start[:8] >= today:
+        return True
+    if not e.rrule_orig:
+        return False
+    last_date = e.get_last_date()
+    return last_date is None or last_date >= today
+
+
+class EventSpill:
+    """Holds compact event records within a memory budget (in bytes).
+    Once the budget is exceeded, the buffer is sorted and written to a
+    temporary file as a run; merge() combines all runs with a k-way merge."""
+
+    def __init__(self, memory_budget):
+        self.memory_budget = memory_budget
+        self.buffer = []
+        self.buffer_size = 0
+        self.reserved = 0  # Size of events held in memory elsewhere
+        self.runs = []
+
+    @staticmethod
+    def sort_key(record):
+        return record[0], record[1]
+
+    @staticmethod
+    def record_size(record):
+        # Rough estimate: serialized size plus per-object overhead
+        return sum(len(str(v)) for v in record) + 200
+
+    def reserve(self, ev):
+        """Counts an event that is kept in memory anyway against the budget."""
+        self.reserved += self.record_size(ev.to_record())
+
+    def append(self, item):
+        record = item.to_record() if isinstance(item, Event) else item
+        self.buffer.append(record)
+        self.buffer_size += self.record_size(record)
+        # At least an eighth of the budget per run, so reserved events
+        # beyond the budget do not produce a temp file per event
+        available = max(self.memory_budget - self.reserved, self.memory_budget // 8)
+        if self.memory_budget and self.buffer_size > available:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        self.buffer.sort(key=self.sort_key)
+        run = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        for record in self.buffer:
+            run.write(json.dumps(record) + "\n")
+        self.runs.append(run)
+        self.buffer = []
+        self.buffer_size = 0
+
+    @staticmethod
+    def _read_run(run):
+        run.seek(0)
+        for line in run:
+            yield json.loads(line)
+        run.close()
+
+    def merge(self, extra_records=()):
+        """Yields all records (plus extra ones) sorted by start with a k-way merge."""
+        self.buffer.extend(extra_records)
+        self.buffer.sort(key=self.sort_key)
+        in_memory = self.buffer
+        self.buffer = []
+        self.buffer_size = 0
+        runs, self.runs = self.runs, []
+        return heapq.merge(
+            *[self._read_run(run) for run in runs], in_memory, key=self.sort_key
+        )
 
-                    try:
-                        start_dt = datetime.strptime(e.start[:8], "%Y%m%d")
-                        end_dt = start_dt + timedelta(days=total_days)
-                        if end_dt.strftime("%Y%m%d") >= today:
-                            is_scenario2 = True
-                    except ValueError:
-                        is_scenario2 = True
-                else:
-                    # Infinite series without UNTIL or COUNT
-                    is_scenario2 = True
+    def replay(self):
+        """Yields the records in insertion order (spilled ones first)."""
+        runs, self.runs = self.runs, []
+        for run in runs:
+            yield from self._read_run(run)
+        buffer, self.buffer = self.buffer, []
+        yield from buffer
+
+
+def read_ics_lines(file_path):
+    """Reads a whole .ics file into a list of lines (empty if it is missing)."""
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.readlines()
+
+
+def write_vcs_file(path, vcs_text):
+    with open(path, "w", encoding="latin-1", errors="replace") as f:
+        f.write(vcs_text)
+
+
+def merge_last_date(last_dates, uid, last_date):
+    """Keeps the latest date per UID; an empty date (endless series) always wins."""
+    prev = last_dates.get(uid)
+    if prev is None or (prev and (not last_date or last_date > prev)):
+        last_dates[uid] = last_date
+
+
+def journal_path_for(profile_path):
+    """The journal lives next to its profile (or in the home folder for unsaved profiles)."""
+    if profile_path:
+        return profile_path + ".journal"
+    return os.path.join(os.path.expanduser("~"), ".s30_converter_journal.jsonl")
+
+
+class RunJournal:
+    """Append-only log of every written .vcs file (JSON lines), so exports
+    survive a crash before the profile is saved. Records are fsynced in
+    batches; a run without end record was interrupted and can be resumed."""
+
+    def __init__(self, path, batch_size=64, sync_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.f = open(path, "a", encoding="utf-8")
+        if self.f.tell() > 0:
+            # Ends a line torn by a crash, so the next record starts cleanly
+            self.f.write("\n")
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def _append(self, record):
+        self.f.write(json.dumps(record) + "\n")
+        # Handed to the OS right away, so a crash of the app loses nothing;
+        # only the fsync against power loss is batched
+        self.f.flush()
+        self.pending += 1
+        if (
+            self.pending >= self.batch_size
+            or time.monotonic() - self.last_sync >= self.sync_interval
+        ):
+            self.sync()
+
+    def sync(self):
+        if self.f.closed:
+            return
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def begin(self, file_paths, targets, options, done_ids=()):
+        """Starts a run. A resumed run passes the (source, UID) pairs written
+        before, so interrupting it again does not forget them."""
+        self._append(
+            {
+                "run": datetime.now().strftime("%Y%m%dT%H%M%S"),
+                "files": list(file_paths),
+                "targets": [[t.profile_path, t.out_dir] for t in targets],
+                "options": options,
+                "done": sorted(done_ids),
+            }
+        )
+        self.sync()
 
-            # Categorize events based on our check
-            if is_scenario2:
-                scenario2_events.append(e)
-            else:
-                dead_past_events.append(e)
+    def record(self, ids, last_date, filename, source):
+        self._append(
+            {"ids": ids, "date": last_date, "file": filename, "source": source}
+        )
 
-        # If all_past is true, we prioritize scenario2 events, then append dead events to fill the quota
-        if all_past:
-            return scenario2_events + dead_past_events
-        else:
-            return scenario2_events
+    def end(self):
+        self._append({"end": True})
+        self.sync()
+
+    def close(self):
+        self.sync()
+        self.f.close()
+
+    @staticmethod
+    def read(path):
+        """Returns (last dates of all journaled ids, interrupted run or None).
+        The interrupted run is the header of the last run without end record,
+        plus the (source .ics file, UID) pairs it had already written."""
+        last_dates = {}
+        run = None
+        if not os.path.exists(path):
+            return last_dates, None
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line of a crashed run
+                if "run" in record:
+                    done = record.pop("done", [])
+                    run = dict(record, done_ids={tuple(d) for d in done})
+                elif "ids" in record:
+                    for i in record["ids"]:
+                        merge_last_date(last_dates, i, record.get("date", ""))
+                    if run is not None and record["ids"]:
+                        run["done_ids"].add(
+                            (record.get("source", ""), record["ids"][0])
+                        )
+                elif "end" in record:
+                    run = None
+        return last_dates, run
+
+    @staticmethod
+    def discard(path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class ConversionTarget:
+    """One phone: its output folder and the UIDs already exported to it."""
+
+    def __init__(
+        self,
+        out_dir,
+        exported_uids=None,
+        profile_path=None,
+        last_dates=None,
+        journal=None,
+        done_uids=None,
+    ):
+        self.out_dir = out_dir
+        self.profile_path = profile_path
+        self.known_uids = set(exported_uids or [])
+        self.last_dates = dict(last_dates or {})
+        self.journal = journal
+        # (source file, UID) pairs written by an interrupted run that is resumed now
+        self.done_uids = set(done_uids or [])
+
+        self.total_files = 0
+        self.total_events = 0
+        self.skipped_events = 0
+        self.new_uids = []
+        # Set when skipped duplicates added or extended dates in the profile
+        self.dates_added = False
+
+    def update_last_date(self, uid, last_date):
+        merge_last_date(self.last_dates, uid, last_date)
+
+    def refresh_last_date(self, uid, event):
+        """Records the last date of a skipped duplicate, so profiles from older
+        versions get dates and extended series are not compacted too early."""
+        prev = self.last_dates.get(uid)
+        merge_last_date(self.last_dates, uid, event.get_last_date() or "")
+        if self.last_dates[uid] != prev:
+            self.dates_added = True
+
+
+class ConversionPipeline:
+    """Runs the conversion as asyncio stages connected by bounded queues:
+    read -> parse -> scan/dedupe -> render -> write.
+    File I/O and parsing run in the default executor, so disk and CPU work
+    overlap, and the queue sizes keep the number of files/events in flight bounded.
+    With a memory_budget (bytes), files are streamed and sorted externally.
+    Every calendar is parsed and rendered once, no matter how many targets
+    (phones) it is written to; only the dedupe and the limit are per target."""
+
+    def __init__(
+        self,
+        file_paths,
+        targets,
+        max_limit=0,
+        all_past=False,
+        skip_dupes=True,
+        device_tz="",
+        content_dedupe=False,
+        queue_size=64,
+        memory_budget=0,
+    ):
+        self.file_paths = list(file_paths)
+        self.targets = list(targets)
+        self.max_limit = max_limit
+        self.all_past = all_past
+        self.skip_dupes = skip_dupes
+        self.device_tz = device_tz
+        self.content_dedupe = content_dedupe
+        self.queue_size = queue_size
+        self.memory_budget = memory_budget
+
+    async def _read_stage(self, out_q):
+        loop = asyncio.get_running_loop()
+        for file_path in self.file_paths:
+            if self.memory_budget:
+                # Bounded mode: the parser streams the file itself
+                lines = None
+            else:
+                lines = await loop.run_in_executor(None, read_ics_lines, file_path)
+            await out_q.put((file_path, lines))
+        await out_q.put(None)
+
+    async def _parse_stage(self, in_q, out_q):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await in_q.get()
+            if item is None:
+                break
+            file_path, lines = item
+            cal = await loop.run_in_executor(
+                None,
+                lambda: Calendar(
+                    file_path,
+                    device_tz=self.device_tz,
+                    lines=lines,
+                    memory_budget=self.memory_budget,
+                ),
+            )
+            await out_q.put((file_path, cal))
+        await out_q.put(None)
+
+    async def _scan_stage(self, in_q, out_q):
+        while True:
+            item = await in_q.get()
+            if item is None:
+                break
+            file_path, cal = item
+            limit = self.max_limit if self.max_limit > 0 else None
+            file_uids = {id(t): set() for t in self.targets}
+            exported = {id(t): 0 for t in self.targets}
+            for e in cal.scan_iter(all_past=self.all_past):
+                content_key = e.get_content_key() if self.content_dedupe else None
+                wanted_by = []
+                for t in self.targets:
+                    if (file_path, e.uid) in t.done_uids:
+                        # Already written for this file before the interruption,
+                        # still counts for the limit
+                        file_uids[id(t)].add(e.uid)
+                        if content_key:
+                            file_uids[id(t)].add(content_key)
+                        exported[id(t)] += 1
+                    # --- Anti-Duplicate Filter ---
+                    elif self.skip_dupes and e.uid in t.known_uids:
+                        t.refresh_last_date(e.uid, e)
+                        t.skipped_events += 1
+                    elif (
+                        self.skip_dupes and content_key and content_key in t.known_uids
+                    ):
+                        t.refresh_last_date(content_key, e)
+                        t.skipped_events += 1
+                    elif content_key and content_key in file_uids[id(t)]:
+                        t.skipped_events += 1
+                    elif limit is None or exported[id(t)] < limit:
+                        file_uids[id(t)].add(e.uid)
+                        if content_key:
+                            file_uids[id(t)].add(content_key)
+                        exported[id(t)] += 1
+                        wanted_by.append(t)
+                if wanted_by:
+                    await out_q.put((e, content_key, wanted_by, file_path))
+                elif (
+                    not (self.skip_dupes or self.content_dedupe)
+                    and limit is not None
+                    and all(exported[id(t)] >= limit for t in self.targets)
+                ):
+                    # Every target is full and no more skips need counting
+                    break
+
+            for t in self.targets:
+                # Exports only count as duplicates for the following files
+                t.known_uids.update(file_uids[id(t)])
+                if exported[id(t)]:
+                    t.total_files += 1
+        await out_q.put(None)
+
+    async def _render_stage(self, in_q, out_q):
+        while True:
+            item = await in_q.get()
+            if item is None:
+                break
+            ev, content_key, targets, source = item
+            ids = [ev.uid, content_key] if content_key else [ev.uid]
+            last_date = ev.get_last_date() or ""
+            await out_q.put(
+                (ids, last_date, ev.get_filename(), ev.toVCS(), targets, source)
+            )
+        await out_q.put(None)
+
+    async def _write_stage(self, in_q):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await in_q.get()
+            if item is None:
+                break
+            ids, last_date, filename, vcs_text, targets, source = item
+            for t in targets:
+                path = os.path.join(t.out_dir, filename)
+                await loop.run_in_executor(
+                    None,
+                    self._write_and_journal,
+                    t,
+                    path,
+                    vcs_text,
+                    ids,
+                    last_date,
+                    source,
+                )
+                t.total_events += 1
+                t.new_uids.extend(ids)
+                for i in ids:
+                    t.update_last_date(i, last_date)
+
+        for t in self.targets:
+            if t.journal is not None:
+                t.journal.sync()
+
+    @staticmethod
+    def _write_and_journal(target, path, vcs_text, ids, last_date, source):
+        write_vcs_file(path, vcs_text)
+        # Journaled only after the file exists, so a crash at worst rewrites it
+        if target.journal is not None:
+            target.journal.record(ids, last_date, os.path.basename(path), source)
+
+    async def run(self):
+        # Whole files (line lists, parsed calendars): one waits per stage at most
+        parse_q = asyncio.Queue(maxsize=1)
+        scan_q = asyncio.Queue(maxsize=1)
+        render_q = asyncio.Queue(maxsize=self.queue_size)
+        write_q = asyncio.Queue(maxsize=self.queue_size)
+        await asyncio.gather(
+            self._read_stage(parse_q),
+            self._parse_stage(parse_q, scan_q),
+            self._scan_stage(scan_q, render_q),
+            self._render_stage(render_q, write_q),
+            self._write_stage(write_q),
+        )
+        return self
 
 
 class NokiaConverterApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Coca - S30+ iCal to VCS Converter")
-        self.root.geometry("500x515")
+        self.root.geometry("500x595")
         self.root.resizable(False, False)
 
         # --- Taskbar fix for Windows ---
@@ -395,13 +1444,23 @@ class NokiaConverterApp:
         self.current_profile_path = None
         self.unsaved_profile_changes = False
         self.exported_uids = []
+        self.uid_dates = {}  # UID -> last date of the event (for compaction)
+        self.interrupted_run = None
+        self.plan_calendars = {}  # (path, mtime, device_tz) -> parsed Calendar
+        self.plan_lock = threading.Lock()  # Guards plan_calendars
+        self.plan_thread = None
+        self.plan_result = None
+        self.plan_pending = False
+        self.plan_after_id = None
         self.last_profile_dir = ""
         self.last_ics_dir = ""  # Remembers the last used directory for .ics files
 
         self.max_events_var = tk.StringVar(value="0")
         self.out_dir_var = tk.StringVar(value=os.path.join(os.getcwd(), "vcs_files"))
+        self.device_tz_var = tk.StringVar(value="")
         self.all_past_var = tk.BooleanVar(value=False)
         self.skip_dupes_var = tk.BooleanVar(value=True)
+        self.content_dedupe_var = tk.BooleanVar(value=False)
 
         # --- Menu Bar ---
         menubar = Menu(self.root)
@@ -410,6 +1469,8 @@ class NokiaConverterApp:
         profile_menu.add_separator()
         profile_menu.add_command(label="Load Profile", command=self.load_profile)
         profile_menu.add_command(label="Save Profile", command=self.save_profile)
+        profile_menu.add_separator()
+        profile_menu.add_command(label="Compact Profile", command=self.compact_profile)
         menubar.add_cascade(label="Profile", menu=profile_menu)
         self.root.config(menu=menubar)
 
@@ -507,11 +1568,23 @@ class NokiaConverterApp:
         self.browse_btn.pack(side=tk.LEFT, padx=5)
         ToolTip(self.browse_btn, "Browse for output folder.")
 
+        tk.Label(settings_frame, text="Phone Timezone:").grid(
+            row=2, column=0, sticky="w", pady=2
+        )
+        self.device_tz_entry = tk.Entry(
+            settings_frame, textvariable=self.device_tz_var, width=20
+        )
+        self.device_tz_entry.grid(row=2, column=1, sticky="w", padx=5)
+        ToolTip(
+            self.device_tz_entry,
+            "Timezone the phone is set to, e.g. 'Europe/Berlin'.\nEvents stored in UTC or another timezone are converted to it.\nLeave empty to use the timezone of this PC.",
+        )
+
         # --- Checkboxes with increased top padding (pady=(15, 2)) ---
         self.chk_past = tk.Checkbutton(
             settings_frame, text="Export past events", variable=self.all_past_var
         )
-        self.chk_past.grid(row=2, column=0, columnspan=2, sticky="w", pady=(15, 2))
+        self.chk_past.grid(row=3, column=0, columnspan=2, sticky="w", pady=(15, 2))
         ToolTip(
             self.chk_past,
             "If checked, past events will also be exported.\nOtherwise, only events from today onwards\n(incl. ongoing past series) are exported.",
@@ -522,15 +1595,54 @@ class NokiaConverterApp:
             text="Skip already exported events of active loaded profile",
             variable=self.skip_dupes_var,
         )
-        self.chk_dupes.grid(row=3, column=0, columnspan=2, sticky="w", pady=2)
+        self.chk_dupes.grid(row=4, column=0, columnspan=2, sticky="w", pady=2)
         ToolTip(
             self.chk_dupes,
             "Uses the active Profile Memory to prevent creating duplicates. ",
         )
 
+        self.chk_content = tk.Checkbutton(
+            settings_frame,
+            text="Skip identical events with different IDs (shared calendars)",
+            variable=self.content_dedupe_var,
+        )
+        self.chk_content.grid(row=5, column=0, columnspan=2, sticky="w", pady=2)
+        ToolTip(
+            self.chk_content,
+            "Compares time, title, location and repetition of all events\nacross all files and the profile, so a meeting that is in\ntwo calendars under different IDs is only exported once.",
+        )
+
+        # --- Export Plan Preview ---
+        self.plan_var = tk.StringVar(value="")
+        self.plan_lbl = tk.Label(
+            root, textvariable=self.plan_var, font=("Arial", 9), fg="#555555"
+        )
+        self.plan_lbl.pack()
+        ToolTip(
+            self.plan_lbl,
+            "Expected result of a conversion with the current settings.\nClick 'Preview' for the details per file.",
+        )
+
         # --- Convert Button ---
+        button_frame = tk.Frame(root)
+        button_frame.pack(pady=(5, 10))
+
+        self.preview_btn = tk.Button(
+            button_frame,
+            text="Preview",
+            command=self.show_plan,
+            font=("Arial", 10),
+            padx=10,
+            pady=5,
+        )
+        self.preview_btn.pack(side=tk.LEFT, padx=5)
+        ToolTip(
+            self.preview_btn,
+            "Dry run: shows per file which events would be exported,\nskipped or shortened, without writing anything.",
+        )
+
         self.convert_btn = tk.Button(
-            root,
+            button_frame,
             text="Convert Files",
             command=self.process_files,
             bg="#4CAF50",
@@ -539,9 +1651,25 @@ class NokiaConverterApp:
             padx=10,
             pady=5,
         )
-        self.convert_btn.pack(pady=(5, 10))
+        self.convert_btn.pack(side=tk.LEFT, padx=5)
         ToolTip(self.convert_btn, "Starts converting all files currently in the list.")
 
+        # The preview follows the settings, debounced while typing
+        for var in (
+            self.max_events_var,
+            self.all_past_var,
+            self.skip_dupes_var,
+            self.content_dedupe_var,
+            self.device_tz_var,
+        ):
+            var.trace_add("write", self.schedule_plan_preview)
+
+        # --- Crash recovery ---
+        if not self.current_profile_path:
+            self.reconcile_journal()
+            self.update_profile_label()
+        self.root.after(200, self.offer_resume)
+
     def update_profile_label(self):
         status = "*" if self.unsaved_profile_changes else ""
         if self.current_profile_path:
@@ -559,10 +1687,14 @@ class NokiaConverterApp:
                         self.max_events_var.set(config["max_events"])
                     if "out_dir" in config:
                         self.out_dir_var.set(config["out_dir"])
+                    if "device_tz" in config:
+                        self.device_tz_var.set(config["device_tz"])
                     if "all_past" in config:
                         self.all_past_var.set(config["all_past"])
                     if "skip_dupes" in config:
                         self.skip_dupes_var.set(config["skip_dupes"])
+                    if "content_dedupe" in config:
+                        self.content_dedupe_var.set(config["content_dedupe"])
                     if "last_profile_dir" in config:
                         self.last_profile_dir = config["last_profile_dir"]
                     if "last_ics_dir" in config:
@@ -579,8 +1711,10 @@ class NokiaConverterApp:
             config = {
                 "max_events": self.max_events_var.get(),
                 "out_dir": self.out_dir_var.get(),
+                "device_tz": self.device_tz_var.get(),
                 "all_past": self.all_past_var.get(),
                 "skip_dupes": self.skip_dupes_var.get(),
+                "content_dedupe": self.content_dedupe_var.get(),
                 "last_profile_path": getattr(self, "current_profile_path", None),
                 "last_profile_dir": getattr(self, "last_profile_dir", ""),
                 "last_ics_dir": getattr(self, "last_ics_dir", ""),
@@ -592,18 +1726,89 @@ class NokiaConverterApp:
 
     def _load_profile_data(self, filepath):
         try:
-            with open(filepath, "r") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    self.exported_uids = data
-                    self.current_profile_path = filepath
-                    self.unsaved_profile_changes = False
-                    self.update_profile_label()
-                    return True
+            self.exported_uids, self.uid_dates = load_uid_profile(filepath)
+            self.current_profile_path = filepath
+            self.unsaved_profile_changes = False
+            self.reconcile_journal()
+            self.update_profile_label()
+            return True
         except Exception:
             pass
         return False
 
+    def reconcile_journal(self):
+        """Adds exports of earlier runs that never made it into the saved profile
+        (e.g. after a crash). An interrupted run is remembered for resuming."""
+        last_dates, run = RunJournal.read(journal_path_for(self.current_profile_path))
+        known = set(self.exported_uids)
+        for uid, last_date in last_dates.items():
+            if uid not in known:
+                self.exported_uids.append(uid)
+                self.unsaved_profile_changes = True
+            merge_last_date(self.uid_dates, uid, last_date)
+        self.interrupted_run = run
+
+    def discard_journal(self):
+        RunJournal.discard(journal_path_for(self.current_profile_path))
+        self.interrupted_run = None
+
+    def offer_resume(self):
+        run = self.interrupted_run
+        if not run:
+            return
+        # Only asked once; the written events stay in the journal either way
+        self.interrupted_run = None
+        journal = RunJournal(journal_path_for(self.current_profile_path))
+        journal.end()
+        journal.close()
+
+        res = messagebox.askyesno(
+            "Interrupted Conversion",
+            f"The conversion started {run['run']} was interrupted after "
+            f"{len(run['done_ids'])} written events.\n\nDo you want to resume it now?",
+        )
+        if res:
+            out_dir = run["targets"][0][1]
+            try:
+                os.makedirs(out_dir, exist_ok=True)
+            except Exception as e:
+                messagebox.showerror(
+                    "Error", f"Could not create output directory:\n{e}"
+                )
+                return
+            self.run_conversion(run["files"], out_dir, run["options"], run["done_ids"])
+
+    def _write_profile(self, filepath):
+        """Writes the profile. Unless past events are exported, expired entries
+        are compacted away first. Returns a note for the success message."""
+        note = ""
+        if self.all_past_var.get():
+            self.exported_uids = list(dict.fromkeys(self.exported_uids))
+        else:
+            self.exported_uids, self.uid_dates, report = compact_profile(
+                self.exported_uids, self.uid_dates
+            )
+            if report["removed_expired"]:
+                note = f"\n\n(Removed {report['removed_expired']} expired events from the profile)"
+        save_uid_profile(filepath, self.exported_uids, self.uid_dates)
+        return note
+
+    def compact_profile(self):
+        """Removes events from the profile that will never be exported again."""
+        self.exported_uids, self.uid_dates, report = compact_profile(
+            self.exported_uids, self.uid_dates
+        )
+        if report["entries_after"] != report["entries_before"]:
+            self.unsaved_profile_changes = True
+            self.update_profile_label()
+            self.update_plan_preview()
+
+        msg = "Profile compacted. Save the profile to keep the result.\n\n"
+        msg += format_compaction_report(report)
+        if self.all_past_var.get():
+            msg += "\n\nNote: 'Export past events' is checked, removed events may be exported again."
+        messagebox.showinfo("Compact Profile", msg)
+
     def new_profile(self):
         """Creates a new empty profile and loads it."""
         if self.unsaved_profile_changes:
@@ -615,6 +1820,8 @@ class NokiaConverterApp:
                 self.save_profile()
             elif res is None:
                 return  # Aborts
+            else:
+                self.discard_journal()
 
         default_name = f"nokia_profile_{datetime.now().strftime('%Y%m%d')}.json"
 
@@ -630,13 +1837,14 @@ class NokiaConverterApp:
             try:
                 self.last_profile_dir = os.path.dirname(filepath)
                 self.exported_uids = []
-                with open(filepath, "w") as f:
-                    json.dump(self.exported_uids, f)
+                self.uid_dates = {}
+                save_uid_profile(filepath, self.exported_uids, self.uid_dates)
 
                 self.current_profile_path = filepath
                 self.unsaved_profile_changes = False
                 self.update_profile_label()
                 self.save_settings()
+                self.update_plan_preview()
                 messagebox.showinfo(
                     "Success", "New profile created and loaded successfully!"
                 )
@@ -654,6 +1862,8 @@ class NokiaConverterApp:
                 self.save_profile()
             elif res is None:
                 return
+            else:
+                self.discard_journal()
 
         filepath = filedialog.askopenfilename(
             title="Load Phone Profile",
@@ -664,13 +1874,15 @@ class NokiaConverterApp:
         if filepath:
             self.last_profile_dir = os.path.dirname(filepath)
             if self._load_profile_data(filepath):
+                self.update_plan_preview()
                 messagebox.showinfo(
                     "Success",
-                    f"Profile loaded successfully!\n\n({len(self.exported_uids)} events in memory)",
+                    f"Profile loaded successfully!\n\n({count_profile_events(self.exported_uids)} events in memory)",
                 )
             else:
                 messagebox.showerror(
-                    "Error", "Invalid profile format. Expected a valid JSON list."
+                    "Error",
+                    "Invalid profile format. Expected a list of exported events.",
                 )
 
     def save_profile(self):
@@ -695,9 +1907,8 @@ class NokiaConverterApp:
 
             try:
                 self.last_profile_dir = dir_name
-                self.exported_uids = list(set(self.exported_uids))
-                with open(filepath, "w") as f:
-                    json.dump(self.exported_uids, f)
+                note = self._write_profile(filepath)
+                self.discard_journal()
 
                 # If the name changed (due to a new date), delete the old file
                 if filepath != old_filepath and os.path.exists(old_filepath):
@@ -708,7 +1919,7 @@ class NokiaConverterApp:
                 self.update_profile_label()
                 messagebox.showinfo(
                     "Success",
-                    f"Profile automatically saved and updated to:\n{new_filename}",
+                    f"Profile automatically saved and updated to:\n{new_filename}{note}",
                 )
             except Exception as e:
                 messagebox.showerror("Error", f"Could not auto-save profile:\n{e}")
@@ -727,14 +1938,13 @@ class NokiaConverterApp:
             if filepath:
                 try:
                     self.last_profile_dir = os.path.dirname(filepath)
-                    self.exported_uids = list(set(self.exported_uids))
-                    with open(filepath, "w") as f:
-                        json.dump(self.exported_uids, f)
+                    note = self._write_profile(filepath)
+                    self.discard_journal()
 
                     self.current_profile_path = filepath
                     self.unsaved_profile_changes = False
                     self.update_profile_label()
-                    messagebox.showinfo("Success", "Profile saved successfully!")
+                    messagebox.showinfo("Success", f"Profile saved successfully!{note}")
                 except Exception as e:
                     messagebox.showerror("Error", f"Could not save profile:\n{e}")
 
@@ -748,6 +1958,8 @@ class NokiaConverterApp:
                 self.save_profile()
             elif res is None:
                 return  # Aborts closing if they hit cancel
+            else:
+                self.discard_journal()
 
         # We only save the UI settings and the path to the last loaded profile.
         # The memory list itself is deliberately wiped from RAM when closing.
@@ -769,6 +1981,7 @@ class NokiaConverterApp:
                 if f not in self.file_paths:
                     self.file_paths.append(f)
                     self.listbox.insert(tk.END, os.path.basename(f))
+            self.update_plan_preview()
 
     def drop_files(self, event):
         files = self.root.tk.splitlist(event.data)
@@ -776,6 +1989,7 @@ class NokiaConverterApp:
             if f.lower().endswith(".ics") and f not in self.file_paths:
                 self.file_paths.append(f)
                 self.listbox.insert(tk.END, os.path.basename(f))
+        self.update_plan_preview()
 
     def remove_selected(self, event=None):
         selection = self.listbox.curselection()
@@ -784,6 +1998,7 @@ class NokiaConverterApp:
         for i in reversed(selection):
             self.listbox.delete(i)
             del self.file_paths[i]
+        self.update_plan_preview()
 
     def show_context_menu(self, event):
         try:
@@ -803,6 +2018,131 @@ class NokiaConverterApp:
         if folder:
             self.out_dir_var.set(folder)
 
+    def get_run_options(self, show_errors=True):
+        """Validates the settings. Returns (max_limit, device_tz) or None."""
+        try:
+            max_limit = int(self.max_events_var.get())
+        except ValueError:
+            if show_errors:
+                messagebox.showerror(
+                    "Invalid Input", "Amount of events must be a valid number."
+                )
+            return None
+
+        device_tz = self.device_tz_var.get().strip()
+        if not is_valid_timezone(device_tz):
+            if show_errors:
+                messagebox.showerror(
+                    "Invalid Input",
+                    f"Unknown timezone '{device_tz}'.\nUse a name like 'Europe/Berlin' or leave it empty.",
+                )
+            return None
+        return max_limit, device_tz
+
+    def plan_request(self, show_errors=True):
+        """Snapshots the current settings as plan_exports arguments, or None."""
+        options = self.get_run_options(show_errors)
+        if options is None or not self.file_paths:
+            return None
+        max_limit, device_tz = options
+        target = ConversionTarget(
+            self.out_dir_var.get(), self.exported_uids, self.current_profile_path
+        )
+        return (
+            list(self.file_paths),
+            [target],
+            dict(
+                max_limit=max_limit,
+                all_past=self.all_past_var.get(),
+                skip_dupes=self.skip_dupes_var.get(),
+                device_tz=device_tz,
+                content_dedupe=self.content_dedupe_var.get(),
+            ),
+        )
+
+    def run_plan(self, request):
+        file_paths, targets, options = request
+        with self.plan_lock:
+            return plan_exports(
+                file_paths, targets, calendar_cache=self.plan_calendars, **options
+            )[0]
+
+    def build_plan(self, show_errors=True):
+        request = self.plan_request(show_errors)
+        if request is None:
+            return None
+        return self.run_plan(request)
+
+    def schedule_plan_preview(self, *args):
+        if self.plan_after_id is not None:
+            self.root.after_cancel(self.plan_after_id)
+        self.plan_after_id = self.root.after(400, self._run_scheduled_preview)
+
+    def _run_scheduled_preview(self):
+        self.plan_after_id = None
+        self.update_plan_preview()
+
+    def update_plan_preview(self):
+        """Refreshes the short plan summary below the file list. Big calendars
+        take a while to classify, so the plan is built in a worker thread."""
+        if self.plan_thread is not None:
+            # Recomputed with the newest settings once the running plan is done
+            self.plan_pending = True
+            return
+        request = self.plan_request(show_errors=False)
+        if request is None:
+            self.plan_var.set("")
+            return
+        self.plan_pending = False
+        self.plan_thread = threading.Thread(
+            target=self._plan_worker, args=(request,), daemon=True
+        )
+        self.plan_thread.start()
+        self.root.after(50, self._poll_plan_preview)
+
+    def _plan_worker(self, request):
+        try:
+            self.plan_result = self.run_plan(request)
+        except Exception:
+            self.plan_result = None
+
+    def _poll_plan_preview(self):
+        # Tk may only be touched from the main thread, so the result is polled
+        if self.plan_thread.is_alive():
+            self.root.after(50, self._poll_plan_preview)
+            return
+        self.plan_thread = None
+        report = self.plan_result
+        if self.plan_pending:
+            self.update_plan_preview()
+        elif report is None:
+            self.plan_var.set("")
+        else:
+            t = report["total"]
+            self.plan_var.set(
+                f"Expected: {t['export']} .vcs files "
+                f"({t['duplicate']} duplicates, {t['past_skipped']} past, {t['over_limit']} over limit)"
+            )
+
+    def show_plan(self):
+        if not self.file_paths:
+            messagebox.showwarning(
+                "No Files", "Please add at least one .ics file to the list."
+            )
+            return
+        report = self.build_plan()
+        if report is None:
+            return
+        self.update_plan_preview()
+
+        win = tk.Toplevel(self.root)
+        win.title("Export Plan (Dry Run)")
+        text = tk.Text(win, font=("Courier New", 9), wrap=tk.NONE, width=110, height=15)
+        text.insert(tk.END, format_plan_table(report))
+        text.insert(tk.END, "\n\n" + json.dumps(report, indent=2))
+        text.config(state=tk.DISABLED)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
     def process_files(self):
         if not self.file_paths:
             messagebox.showwarning(
@@ -820,70 +2160,778 @@ class NokiaConverterApp:
                 )
                 return
 
+        options = self.get_run_options()
+        if options is None:
+            return
+        max_limit, device_tz = options
+
+        self.run_conversion(
+            list(self.file_paths),
+            out_dir,
+            {
+                "max_limit": max_limit,
+                "all_past": self.all_past_var.get(),
+                "skip_dupes": self.skip_dupes_var.get(),
+                "device_tz": device_tz,
+                "content_dedupe": self.content_dedupe_var.get(),
+            },
+        )
+
+    def run_conversion(self, file_paths, out_dir, options, done_uids=None):
+        """Converts the files while journaling every written .vcs file."""
+        journal = RunJournal(journal_path_for(self.current_profile_path))
+        target = ConversionTarget(
+            out_dir,
+            self.exported_uids,
+            self.current_profile_path,
+            self.uid_dates,
+            journal=journal,
+            done_uids=done_uids,
+        )
+        journal.begin(file_paths, [target], options, target.done_uids)
+        pipeline = ConversionPipeline(file_paths, [target], **options)
+        error = None
         try:
-            max_limit = int(self.max_events_var.get())
-        except ValueError:
+            asyncio.run(pipeline.run())
+            journal.end()
+        except Exception as e:
+            error = e
+        finally:
+            journal.close()
+            # Files written before an error are kept in the profile as well
+            self.exported_uids.extend(target.new_uids)
+            self.uid_dates.update(target.last_dates)
+            if target.new_uids or target.dates_added:
+                self.unsaved_profile_changes = True
+                self.update_profile_label()
+
+        self.save_settings()
+        if self.file_paths:
+            self.update_plan_preview()
+
+        total_files = target.total_files
+        total_events = target.total_events
+        skipped_events = target.skipped_events
+        if error is not None:
             messagebox.showerror(
-                "Invalid Input", "Amount of events must be a valid number."
+                "Error",
+                f"Conversion stopped:\n{error}\n\n{total_events} .vcs files had already been written to:\n{out_dir}",
             )
             return
 
-        all_past = self.all_past_var.get()
-        skip_dupes = self.skip_dupes_var.get()
+        msg = f"Done!\n\nProcessed {total_files} file(s).\nCreated {total_events} new .vcs files in:\n{out_dir}"
+        if done_uids:
+            msg += f"\n\n(Resumed run, {len(done_uids)} events had already been written before)"
+        if skipped_events > 0:
+            msg += f"\n\n(Skipped {skipped_events} events that were already exported previously)"
 
-        total_files = 0
-        total_events = 0
-        skipped_events = 0
-        new_exports_added = False
+        messagebox.showinfo("Success", msg)
 
-        for file_path in self.file_paths:
-            cal = Calendar(file_path)
-            found_events = cal.scan(all_past=all_past)
-
-            # --- Anti-Duplicate Filter ---
-            if skip_dupes:
-                filtered_events = []
-                for e in found_events:
-                    if e.uid in self.exported_uids:
-                        skipped_events += 1
-                    else:
-                        filtered_events.append(e)
-                found_events = filtered_events
 
-            total_found = len(found_events)
-            if total_found == 0:
-                continue
+PLAN_COLUMNS = (
+    "future",
+    "ongoing",
+    "past",
+    "past_skipped",
+    "duplicate",
+    "over_limit",
+    "export",
+    "truncated_title",
+    "filename_collision",
+)
+
+
+def plan_exports(
+    file_paths,
+    targets,
+    max_limit=0,
+    all_past=False,
+    skip_dupes=True,
+    device_tz="",
+    memory_budget=0,
+    content_dedupe=False,
+    calendar_cache=None,
+):
+    """Dry run: classifies every event exactly like a conversion would,
+    without rendering or writing anything. Returns one report per target.
+    calendar_cache (a dict) keeps the parsed calendars of the last call, keyed
+    by (path, mtime, device_tz), so unchanged files are not parsed again.
+    It is not used with a memory budget."""
+    today = datetime.now().strftime("%Y%m%d")
+    limit = max_limit if max_limit > 0 else None
+    known = {id(t): set(t.known_uids) for t in targets}
+    seen_names = {id(t): set() for t in targets}
+    reports = {
+        id(t): {
+            "out_dir": t.out_dir,
+            "profile": t.profile_path,
+            "files": [],
+            "total": dict.fromkeys(PLAN_COLUMNS, 0),
+        }
+        for t in targets
+    }
 
-            limit = max_limit if max_limit > 0 else total_found
-            export_count = min(limit, total_found)
+    used_calendars = {}
+    for file_path in file_paths:
+        if calendar_cache is None or memory_budget:
+            cal = Calendar(file_path, device_tz=device_tz, memory_budget=memory_budget)
+        else:
+            try:
+                key = (file_path, os.path.getmtime(file_path), device_tz)
+            except OSError:
+                key = (file_path, None, device_tz)
+            cal = calendar_cache.get(key)
+            if cal is None:
+                cal = Calendar(file_path, device_tz=device_tz)
+            used_calendars[key] = cal
+        counts = {id(t): dict.fromkeys(PLAN_COLUMNS, 0) for t in targets}
+        file_uids = {id(t): set() for t in targets}
+
+        # all_past=True so dead events are classified too; the order matches scan()
+        for e in cal.scan_iter(all_past=True):
+            if e.start[:8] >= today:
+                category = "future"
+            elif is_scenario2(e, today):
+                category = "ongoing"
+            else:
+                category = "past"
+            truncated = None
+            content_key = e.get_content_key() if content_dedupe else None
+
+            for t in targets:
+                c = counts[id(t)]
+                c[category] += 1
+                if category == "past" and not all_past:
+                    c["past_skipped"] += 1
+                elif skip_dupes and e.uid in known[id(t)]:
+                    c["duplicate"] += 1
+                elif content_key and (
+                    (skip_dupes and content_key in known[id(t)])
+                    or content_key in file_uids[id(t)]
+                ):
+                    c["duplicate"] += 1
+                elif limit is not None and c["export"] >= limit:
+                    c["over_limit"] += 1
+                else:
+                    c["export"] += 1
+                    file_uids[id(t)].add(e.uid)
+                    if content_key:
+                        file_uids[id(t)].add(content_key)
+                    if truncated is None:
+                        truncated = e.is_title_truncated()
+                    if truncated:
+                        c["truncated_title"] += 1
+                    filename = e.get_filename()
+                    if filename in seen_names[id(t)]:
+                        c["filename_collision"] += 1
+                    seen_names[id(t)].add(filename)
+
+        for t in targets:
+            known[id(t)].update(file_uids[id(t)])
+            report = reports[id(t)]
+            report["files"].append(dict(file=file_path, **counts[id(t)]))
+            for k, v in counts[id(t)].items():
+                report["total"][k] += v
+
+    if calendar_cache is not None and not memory_budget:
+        # Files that were removed or changed since the last call drop out
+        calendar_cache.clear()
+        calendar_cache.update(used_calendars)
+    return [reports[id(t)] for t in targets]
+
+
+def format_plan_table(report):
+    """Renders a dry run report as a plain text table."""
+    headers = ["File"] + [c.replace("_", " ") for c in PLAN_COLUMNS]
+    rows = [
+        [os.path.basename(f["file"])] + [str(f[c]) for c in PLAN_COLUMNS]
+        for f in report["files"]
+    ]
+    rows.append(["TOTAL"] + [str(report["total"][c]) for c in PLAN_COLUMNS])
+    widths = [max(len(r[i]) for r in rows + [headers]) for i in range(len(headers))]
+    lines = [
+        "  ".join(
+            h.ljust(w) if i == 0 else h.rjust(w)
+            for i, (h, w) in enumerate(zip(row, widths))
+        )
+        for row in [headers] + rows
+    ]
+    lines.insert(1, "-" * len(lines[0]))
+    lines.insert(len(lines) - 1, "-" * len(lines[0]))
+    return "\n".join(lines)
 
-            for i in range(export_count):
-                ev = found_events[i]
-                vcs_text = ev.toVCS()
-                path = os.path.join(out_dir, ev.get_filename())
-                with open(path, "w", encoding="latin-1", errors="replace") as f:
-                    f.write(vcs_text)
 
-                total_events += 1
-                self.exported_uids.append(ev.uid)
-                new_exports_added = True
+def bundle_vcs(vcs_texts):
+    """Combines single-event vCalendars into one VCALENDAR with several VEVENTs."""
+    lines = ["BEGIN:VCALENDAR", "VERSION:1.0"]
+    for text in vcs_texts:
+        lines.extend(text.split("\r\n")[2:-1])
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines)
 
-            total_files += 1
 
-        if new_exports_added:
-            self.unsaved_profile_changes = True
-            self.update_profile_label()
+class ConversionService:
+    """Local HTTP service for other tools.
 
-        self.save_settings()
+    POST /convert with an .ics body (Content-Length or chunked) returns a ZIP
+    of .vcs files, or one bundled vCalendar with ?format=vcs. Further query
+    options: max_events, all_past=1, device_tz (defaults to the service's). GET /metrics returns latency
+    and throughput as JSON. Conversions run on a bounded worker pool; parsed
+    calendars, timezone tables and cleaned texts stay cached between requests."""
 
-        msg = f"Done!\n\nProcessed {total_files} file(s).\nCreated {total_events} new .vcs files in:\n{out_dir}"
-        if skip_dupes and skipped_events > 0:
-            msg += f"\n\n(Skipped {skipped_events} events that were already exported previously)"
+    def __init__(
+        self,
+        workers=4,
+        timeout=60,
+        device_tz="",
+        max_body=50 * 1024 * 1024,
+        cache_size=32,
+    ):
+        self.workers = workers
+        self.device_tz = device_tz
+        self.timeout = timeout
+        self.max_body = max_body
+        self.cache_size = cache_size
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        # Uploading, running and waiting conversions; more are answered with 503
+        self.slots = threading.BoundedSemaphore(workers * 2)
+        self.lock = threading.Lock()
+        self.calendar_cache = OrderedDict()  # (sha1 of body, device_tz) -> Calendar
+
+        self.started = time.monotonic()
+        self.latencies = deque(maxlen=1000)
+        self.counters = dict.fromkeys(
+            (
+                "requests",
+                "converted",
+                "failed",
+                "rejected_busy",
+                "timeouts",
+                "events",
+                "bytes_received",
+                "cache_hits",
+                "cache_misses",
+            ),
+            0,
+        )
+        self.in_flight = 0
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def release_slot(self, future):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def get_calendar(self, body, device_tz):
+        key = (hashlib.sha1(body).hexdigest(), device_tz)
+        with self.lock:
+            cached = self.calendar_cache.get(key)
+            if cached is not None:
+                self.calendar_cache.move_to_end(key)
+                self.counters["cache_hits"] += 1
+        if cached is None:
+            lines = body.decode("utf-8", errors="ignore").splitlines()
+            cached = Calendar("", device_tz=device_tz, lines=lines)
+            with self.lock:
+                self.counters["cache_misses"] += 1
+                self.calendar_cache[key] = cached
+                while len(self.calendar_cache) > self.cache_size:
+                    self.calendar_cache.popitem(last=False)
+        # scan() sorts in place, so every request works on its own list
+        cal = copy.copy(cached)
+        cal.events = list(cached.events)
+        return cal
+
+    def convert(self, body, max_limit=0, all_past=False, device_tz="", fmt="zip"):
+        """Converts an .ics payload. Returns (content type, payload, number of events)."""
+        cal = self.get_calendar(body, device_tz)
+        found_events = cal.scan(all_past=all_past)
+        if max_limit > 0:
+            found_events = found_events[:max_limit]
+
+        # Same file name twice: the later event wins, like in the output folder
+        files = {}
+        for ev in found_events:
+            files[ev.get_filename()] = ev.toVCS()
+
+        if fmt == "vcs":
+            payload = bundle_vcs(files.values()).encode("latin-1", errors="replace")
+            return "text/x-vcalendar", payload, len(files)
+
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, text in files.items():
+                zf.writestr(name, text.encode("latin-1", errors="replace"))
+        return "application/zip", buf.getvalue(), len(files)
+
+    def get_metrics(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            metrics = dict(self.counters)
+            metrics["in_flight"] = self.in_flight
+        uptime = time.monotonic() - self.started
+        metrics["uptime_s"] = round(uptime, 1)
+        metrics["workers"] = self.workers
+        metrics["requests_per_s"] = (
+            round(metrics["converted"] / uptime, 3) if uptime else 0
+        )
+        metrics["events_per_s"] = round(metrics["events"] / uptime, 3) if uptime else 0
+        if latencies:
+            metrics["latency_ms"] = {
+                "avg": round(sum(latencies) / len(latencies), 1),
+                "p50": round(latencies[len(latencies) // 2], 1),
+                "p95": round(latencies[int(len(latencies) * 0.95)], 1),
+                "max": round(latencies[-1], 1),
+            }
+        return metrics
+
+    def make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Socket timeout, so slow clients cannot hold a thread forever
+            timeout = service.timeout
+
+            def send(self, status, content_type, payload, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def send_error_json(self, status, message):
+                payload = json.dumps({"error": message}).encode("utf-8")
+                self.send(status, "application/json", payload)
+
+            def read_body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    chunks = []
+                    size = 0
+                    while True:
+                        chunk_len = int(
+                            self.rfile.readline().split(b";")[0].strip(), 16
+                        )
+                        if chunk_len == 0:
+                            self.rfile.readline()
+                            break
+                        size += chunk_len
+                        if size > service.max_body:
+                            return None
+                        chunks.append(self.rfile.read(chunk_len))
+                        self.rfile.readline()
+                    return b"".join(chunks)
+                length = int(self.headers.get("Content-Length", 0))
+                if length > service.max_body:
+                    return None
+                return self.rfile.read(length)
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == "/metrics":
+                    payload = json.dumps(service.get_metrics(), indent=2).encode(
+                        "utf-8"
+                    )
+                    self.send(200, "application/json", payload)
+                else:
+                    self.send_error_json(404, "Not found")
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path != "/convert":
+                    self.send_error_json(404, "Not found")
+                    return
+                service.count("requests")
+                query = parse_qs(url.query)
+                try:
+                    max_limit = int(query.get("max_events", ["0"])[0])
+                except ValueError:
+                    self.send_error_json(400, "max_events must be a number")
+                    return
+                all_past = query.get("all_past", ["0"])[0].lower() in (
+                    "1",
+                    "true",
+                    "yes",
+                )
+                device_tz = query.get("device_tz", [service.device_tz])[0]
+                fmt = query.get("format", ["zip"])[0].lower()
+                if fmt not in ("zip", "vcs"):
+                    self.send_error_json(400, "format must be 'zip' or 'vcs'")
+                    return
+                if not is_valid_timezone(device_tz):
+                    self.send_error_json(400, f"Unknown timezone '{device_tz}'")
+                    return
+
+                # The slot is taken before the upload is read, so it also
+                # bounds the memory held by request bodies
+                if not service.slots.acquire(blocking=False):
+                    service.count("rejected_busy")
+                    self.send_error_json(503, "Too many conversions in progress")
+                    return
+                with service.lock:
+                    service.in_flight += 1
+                future = None
+                try:
+                    try:
+                        body = self.read_body()
+                    except (ValueError, OSError):
+                        self.send_error_json(400, "Invalid request body")
+                        return
+                    if body is None:
+                        self.send_error_json(413, "Request body too large")
+                        return
+                    service.count("bytes_received", len(body))
+                    start = time.monotonic()
+                    future = service.pool.submit(
+                        service.convert, body, max_limit, all_past, device_tz, fmt
+                    )
+                finally:
+                    if future is None:
+                        service.release_slot(None)
+                # The slot is only freed once the work is really done, even after a timeout
+                future.add_done_callback(service.release_slot)
+                try:
+                    content_type, payload, n_events = future.result(
+                        timeout=service.timeout
+                    )
+                except FutureTimeout:
+                    service.count("timeouts")
+                    self.send_error_json(504, "Conversion timed out")
+                    return
+                except Exception as e:
+                    service.count("failed")
+                    self.send_error_json(500, f"Conversion failed: {e}")
+                    return
+
+                with service.lock:
+                    service.latencies.append((time.monotonic() - start) * 1000)
+                    service.counters["converted"] += 1
+                    service.counters["events"] += n_events
+                filename = "calendar.vcs" if fmt == "vcs" else "vcs_files.zip"
+                self.send(
+                    200,
+                    content_type,
+                    payload,
+                    {
+                        "Content-Disposition": f'attachment; filename="{filename}"',
+                        "X-Event-Count": str(n_events),
+                    },
+                )
 
-        messagebox.showinfo("Success", msg)
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=8030):
+        server = ThreadingHTTPServer((host, port), self.make_handler())
+        print(f"Serving on http://{host}:{port} (POST /convert, GET /metrics)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.pool.shutdown(wait=False)
+
+
+def count_profile_events(exported_uids):
+    """Number of exported events in a profile list (content keys excluded)."""
+    return sum(
+        1 for uid in exported_uids if not str(uid).startswith(CONTENT_KEY_PREFIX)
+    )
+
+
+def load_uid_profile(path):
+    """Reads a profile JSON. Returns (exported UIDs, last dates per UID).
+    Old profiles are a plain list of UIDs without dates. A missing file is an empty profile.
+    """
+    if not path or not os.path.exists(path):
+        return [], {}
+    with open(path, "r") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data, {}
+    if isinstance(data, dict) and isinstance(data.get("exported_uids"), list):
+        return data["exported_uids"], dict(data.get("last_dates", {}))
+    raise ValueError("Invalid profile format. Expected a list of exported events.")
+
+
+def save_uid_profile(path, exported_uids, last_dates):
+    uids = list(dict.fromkeys(exported_uids))
+    data = {
+        "exported_uids": uids,
+        "last_dates": {u: last_dates[u] for u in uids if u in last_dates},
+    }
+    # Written next to the profile and swapped in atomically, so a crash while
+    # saving leaves the previous profile (and its journal) intact
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=".profile_", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path))
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def compact_profile(exported_uids, last_dates, keep_days=PROFILE_KEEP_DAYS):
+    """Drops profile entries whose last date lies more than keep_days in the past.
+    Calendar.scan never exports such events again (unless past events are
+    exported), so they no longer need to be remembered. Entries without a
+    date (older profiles) and endless series are kept.
+    Returns (kept UIDs, kept dates, report)."""
+    cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y%m%d")
+    uids = list(dict.fromkeys(exported_uids))
+    kept = [u for u in uids if not (last_dates.get(u) and last_dates[u] < cutoff)]
+    kept_dates = {u: last_dates[u] for u in kept if u in last_dates}
+
+    size_before = len(
+        json.dumps({"exported_uids": exported_uids, "last_dates": last_dates})
+    )
+    size_after = len(json.dumps({"exported_uids": kept, "last_dates": kept_dates}))
+    report = {
+        "entries_before": len(exported_uids),
+        "entries_after": len(kept),
+        "removed_duplicates": len(exported_uids) - len(uids),
+        "removed_expired": len(uids) - len(kept),
+        "undated": sum(1 for u in kept if u not in last_dates),
+        "bytes_before": size_before,
+        "bytes_after": size_after,
+    }
+    return kept, kept_dates, report
+
+
+def format_compaction_report(report):
+    saved = report["bytes_before"] - report["bytes_after"]
+    percent = 100 * saved / report["bytes_before"] if report["bytes_before"] else 0
+    return (
+        f"Entries: {report['entries_before']} -> {report['entries_after']} "
+        f"({report['removed_expired']} expired, {report['removed_duplicates']} duplicates removed)\n"
+        f"Size: {report['bytes_before']} -> {report['bytes_after']} bytes ({percent:.0f}% saved)\n"
+        f"Entries without date (kept): {report['undated']}"
+    )
+
+
+def run_headless(argv):
+    """Command line entry point, converts without opening the window."""
+    parser = argparse.ArgumentParser(
+        description="Converts .ics files to .vcs files for Nokia S30+ phones."
+    )
+    parser.add_argument("files", nargs="*", help=".ics files to convert")
+    parser.add_argument(
+        "-o", "--out-dir", default=os.path.join(os.getcwd(), "vcs_files")
+    )
+    parser.add_argument(
+        "-n", "--max-events", type=int, default=0, help="0 means all events"
+    )
+    parser.add_argument("--all-past", action="store_true", help="Export past events")
+    parser.add_argument(
+        "--device-tz", default="", help="Phone timezone, empty for this PC's timezone"
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=0,
+        help="Memory budget in MB for sorting huge calendars on disk, 0 sorts in memory. "
+        "Recurring events always stay in memory and count against it",
+    )
+    parser.add_argument(
+        "--profile", help="Profile JSON with already exported UIDs (updated in place)"
+    )
+    parser.add_argument(
+        "--target",
+        nargs=2,
+        action="append",
+        metavar=("PROFILE", "OUT_DIR"),
+        help="Phone profile and its output folder, repeat for several phones "
+        "(replaces --profile/--out-dir)",
+    )
+    parser.add_argument(
+        "--content-dedupe",
+        action="store_true",
+        help="Also skip events with the same content but a different UID",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Remove expired events from the profiles (also works without files)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted conversion of the given profiles",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print what would be exported, without writing anything",
+    )
+    parser.add_argument(
+        "--plan-json", help="With --dry-run: also save the report as JSON to this file"
+    )
+    parser.add_argument(
+        "--serve",
+        type=int,
+        metavar="PORT",
+        help="Run as local HTTP conversion service instead of converting files",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="With --serve: address to bind"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="With --serve: parallel conversions"
+    )
+    parser.add_argument(
+        "--timeout", type=int, default=60, help="With --serve: seconds per request"
+    )
+    parser.add_argument(
+        "--no-skip-dupes",
+        action="store_true",
+        help="Also export events already listed in the profile",
+    )
+    args = parser.parse_args(argv)
+
+    if get_zoneinfo_table(args.device_tz) is None:
+        parser.error(f"Unknown timezone '{args.device_tz}'")
+
+    if args.serve:
+        service = ConversionService(
+            workers=args.workers, timeout=args.timeout, device_tz=args.device_tz
+        )
+        service.serve(args.host, args.serve)
+        return 0
+    if not args.files and not args.compact and not args.resume:
+        parser.error("No .ics files given")
+    if args.resume and not (args.target or args.profile):
+        parser.error("--resume needs --profile or --target")
+
+    files = args.files
+    options = {
+        "max_limit": args.max_events,
+        "all_past": args.all_past,
+        "skip_dupes": not args.no_skip_dupes,
+        "device_tz": args.device_tz,
+        "content_dedupe": args.content_dedupe,
+        "memory_budget": args.memory_budget * 1024 * 1024,
+    }
+
+    pairs = args.target or [(args.profile, args.out_dir)]
+    targets = []
+    profile_uids = {}  # id(target) -> UID list as loaded, in profile order
+    interrupted = None
+    for profile_path, out_dir in pairs:
+        try:
+            exported_uids, last_dates = load_uid_profile(profile_path)
+        except (ValueError, OSError) as e:
+            parser.error(f"{profile_path}: {e}")
+
+        done_uids = set()
+        if profile_path:
+            # Exports of crashed runs that never made it into the profile
+            journal_dates, run = RunJournal.read(journal_path_for(profile_path))
+            known = set(exported_uids)
+            exported_uids += [u for u in journal_dates if u not in known]
+            for uid, last_date in journal_dates.items():
+                merge_last_date(last_dates, uid, last_date)
+            if args.resume and run:
+                interrupted = interrupted or run
+                done_uids = run["done_ids"]
+                out_dir = dict(run["targets"]).get(profile_path, out_dir)
+        targets.append(
+            ConversionTarget(
+                out_dir, exported_uids, profile_path, last_dates, done_uids=done_uids
+            )
+        )
+        profile_uids[id(targets[-1])] = exported_uids
+
+    if args.resume:
+        if interrupted is None:
+            print("No interrupted conversion to resume.")
+            return 0
+        files = interrupted["files"]
+        options = interrupted["options"]
+        print(f"Resuming the conversion started {interrupted['run']}")
+
+    if not files:
+        for t in targets:
+            if not t.profile_path:
+                continue
+            uids, dates, report = compact_profile(profile_uids[id(t)], t.last_dates)
+            save_uid_profile(t.profile_path, uids, dates)
+            RunJournal.discard(journal_path_for(t.profile_path))
+            print(f"Compacted {t.profile_path}:")
+            print(format_compaction_report(report))
+        return 0
+
+    if args.dry_run:
+        reports = plan_exports(files, targets, **options)
+        for report in reports:
+            print(f"Export plan for: {report['out_dir']}")
+            print(format_plan_table(report))
+            print()
+        if args.plan_json:
+            with open(args.plan_json, "w") as f:
+                json.dump(reports, f, indent=2)
+        return 0
+
+    for t in targets:
+        os.makedirs(t.out_dir, exist_ok=True)
+        if t.profile_path:
+            t.journal = RunJournal(journal_path_for(t.profile_path))
+    for t in targets:
+        if t.journal is not None:
+            t.journal.begin(files, targets, options, t.done_uids)
+
+    pipeline = ConversionPipeline(files, targets, **options)
+    try:
+        asyncio.run(pipeline.run())
+        for t in targets:
+            if t.journal is not None:
+                t.journal.end()
+    finally:
+        for t in targets:
+            if t.journal is not None:
+                t.journal.close()
+
+    for t in targets:
+        if t.profile_path:
+            # Appended like in the GUI, so the profile keeps its order
+            uids, dates = profile_uids[id(t)] + t.new_uids, t.last_dates
+            if args.compact:
+                uids, dates, report = compact_profile(uids, dates)
+                print(f"Compacted {t.profile_path}:")
+                print(format_compaction_report(report))
+            save_uid_profile(t.profile_path, uids, dates)
+            # The profile is up to date now, the journal is no longer needed
+            RunJournal.discard(t.journal.path)
+
+        print(
+            f"Processed {t.total_files} file(s). "
+            f"Created {t.total_events} new .vcs files in: {t.out_dir}"
+        )
+        if t.skipped_events:
+            print(
+                f"Skipped {t.skipped_events} events that were already exported previously"
+            )
+    return 0
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_headless(sys.argv[1:]))
+
     # Use TkinterDnD instead of tk.Tk() for Drag & Drop support
     root = TkinterDnD.Tk()
     app = NokiaConverterApp(root)